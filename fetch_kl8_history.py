@@ -2,6 +2,7 @@ import requests
 import json
 import csv
 import time
+import os
 from datetime import datetime
 
 def fetch_kl8_data(page_num):
@@ -82,7 +83,7 @@ def save_to_csv(data_list, filename='kl8_history.csv'):
     except Exception as e:
         print(f"Error saving to CSV: {e}")
 
-def main():
+def fetch_all_draws():
     all_data = []
     page = 1
     total_pages = None
@@ -135,14 +136,51 @@ def main():
         page += 1
         time.sleep(1)  # 添加延迟，避免请求过快
     
+    # 按期号降序排序（最新的在前面）
+    all_data.sort(key=lambda x: int(x[0]), reverse=True)
+    return all_data
+
+def sync_predictor(predictor, data_list):
+    """将新开奖数据增量加入预测器，并预先计算下一期预测所需的分析结果"""
+    latest_issue = predictor.get_latest_issue()
+    new_draws = [row for row in data_list if int(row[0]) > latest_issue]
+    # data_list按期号降序，从旧到新依次加入
+    for issue, date, numbers in reversed(new_draws):
+        predictor.ingest_draw(issue, date, [int(n) for n in numbers.split(',')])
+    predictor.warm_cache()
+    print(f"Ingested {len(new_draws)} new draws into predictor")
+    return len(new_draws)
+
+def main(predictor=None, filename='kl8_history.csv'):
+    all_data = fetch_all_draws()
+    
     # 保存数据到CSV文件
     if all_data:
-        # 按期号降序排序（最新的在前面）
-        all_data.sort(key=lambda x: int(x[0]), reverse=True)
-        save_to_csv(all_data)
+        save_to_csv(all_data, filename)
         print(f"Total records saved: {len(all_data)}")
+        if predictor is not None:
+            sync_predictor(predictor, all_data)
     else:
         print("No data collected")
 
+def daily_sync(filename='kl8_history.csv'):
+    """每日同步：抓取后将新开奖增量加入预测器，并保存统计量快照
+
+    之后创建的KL8Predictor直接加载快照，无需重新扫描全部历史数据即可预测下一期。
+    """
+    predictor = None
+    if os.path.exists(filename):
+        from kl8_predictor import KL8Predictor
+        predictor = KL8Predictor(filename)
+    main(predictor, filename)
+    if predictor is None and os.path.exists(filename):
+        # 首次同步没有已有数据，抓取完成后全量构建
+        from kl8_predictor import KL8Predictor
+        predictor = KL8Predictor(filename)
+        predictor.warm_cache()
+    if predictor is not None:
+        predictor.save_snapshot()
+    return predictor
+
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    daily_sync()
@@ -0,0 +1,222 @@
+import copy
+import gzip
+import json
+import os
+from datetime import datetime
+
+# 统计数据包格式版本，结构不兼容时递增
+BUNDLE_FORMAT_VERSION = 1
+
+
+def _round_list(values, digits=6):
+    """将浮点数组转换为保留指定小数位的列表"""
+    return [round(float(v), digits) for v in values]
+
+
+def _pairs_to_list(items):
+    """将 [(号码组合, 次数), ...] 转换为可序列化的列表"""
+    return [[[int(n) for n in combination], int(count)] for combination, count in items]
+
+
+def build_bundle(predictor, top_k=10, recent_count=100):
+    """根据预测器维护的统计量构建客户端所需的统计数据包
+
+    recent_draws保留最近recent_count期开奖，供客户端基于近期窗口的分析使用。
+    """
+    recent_draws = predictor.get_recent_draws(recent_count)
+    latest = recent_draws[0]
+
+    weighted_freq = predictor.analyze_frequency(weight_recent=True)
+    recent_freq = predictor.analyze_frequency(days=30, weight_recent=False)
+    calendar = predictor.get_calendar_stats()
+    omission = predictor.get_omission_stats()
+    number_patterns = predictor.analyze_number_patterns()
+    trend_patterns = predictor.analyze_trend_patterns()
+
+    return {
+        'format_version': BUNDLE_FORMAT_VERSION,
+        'type': 'full',
+        'data_version': latest['issue'],
+        'generated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'draw_count': int(predictor.get_draw_count()),
+        'last_draw': latest,
+        'recent_draws': [[draw['issue'], draw['date'], draw['numbers']] for draw in recent_draws],
+        # 频率向量，下标0对应号码1
+        'frequency': {
+            'all': predictor.get_number_counts().tolist(),
+            'weighted': _round_list(weighted_freq.get(num, 0) for num in range(1, 81)),
+            'recent_30_days': [int(recent_freq.get(num, 0)) for num in range(1, 81)]
+        },
+        # 同日期（下标为日，0不使用）、同星期（下标0为星期一）频率表
+        'calendar': {
+            'day_counts': calendar['day_counts'].tolist(),
+            'day_draws': calendar['day_draws'].tolist(),
+            'day_recent': [[[int(n) for n in numbers] for numbers in day] for day in calendar['day_recent']],
+            'weekday_counts': calendar['weekday_counts'].tolist(),
+            'weekday_draws': calendar['weekday_draws'].tolist()
+        },
+        'omission': {
+            'current': omission['current'].tolist(),
+            'max': omission['max'].tolist()
+        },
+        'cooccurrence_top': [
+            [[other, count] for other, count in partners]
+            for _, partners in sorted(predictor.get_cooccurrence_top(top_k).items())
+        ],
+        # 最近30天的号码组合模式
+        'number_patterns': {
+            'common_consecutive_pairs': _pairs_to_list(number_patterns['common_consecutive_pairs']),
+            'common_number_pairs': _pairs_to_list(number_patterns['common_number_pairs']),
+            'sum_range_stats': {key: round(float(value), 6) for key, value in number_patterns['sum_range_stats'].items()},
+            'max_gap_stats': {key: round(float(value), 6) for key, value in number_patterns['max_gap_stats'].items()},
+            'common_zone_combinations': _pairs_to_list(number_patterns['common_zone_combinations'])
+        },
+        'trend_patterns': {key: [int(n) for n in numbers] for key, numbers in trend_patterns.items()},
+        'ev_table': [
+            {
+                'play_type': strategy['play_type'],
+                'numbers_count': strategy['numbers_count'],
+                'expected_value': round(strategy['expected_value'], 6),
+                'numbers': strategy['numbers']
+            }
+            for strategy in predictor.find_best_strategy()
+        ]
+    }
+
+
+def _diff(old, new, path, operations):
+    """逐层比较，记录发生变化的字段；二维表只记录变化的行"""
+    if isinstance(old, dict) and isinstance(new, dict) and old.keys() == new.keys():
+        for key in new:
+            _diff(old[key], new[key], path + [key], operations)
+    elif (isinstance(old, list) and isinstance(new, list) and len(old) == len(new)
+          and new and all(isinstance(row, list) for row in new)):
+        for index, (old_row, new_row) in enumerate(zip(old, new)):
+            if old_row != new_row:
+                operations.append({'path': path + [index], 'value': new_row})
+    elif old != new:
+        operations.append({'path': path, 'value': new})
+
+
+def _diff_recent_draws(old, new, operations):
+    """近期开奖窗口只记录新增的开奖，客户端在前面插入后截断到原长度"""
+    added = [draw for draw in new if not old or draw[0] > old[0][0]]
+    if added and added + old[:len(new) - len(added)] == new:
+        operations.append({'path': ['recent_draws'], 'prepend': added, 'limit': len(new)})
+    elif old != new:
+        operations.append({'path': ['recent_draws'], 'value': new})
+
+
+def build_delta(base, bundle):
+    """计算两个统计数据包之间的增量"""
+    if base['format_version'] != bundle['format_version']:
+        raise ValueError("数据包格式版本不一致，无法生成增量")
+
+    operations = []
+    for key in bundle:
+        if key == 'recent_draws':
+            _diff_recent_draws(base.get(key) or [], bundle[key], operations)
+        elif key not in ('format_version', 'type', 'data_version', 'generated_at'):
+            _diff(base.get(key), bundle[key], [key], operations)
+
+    return {
+        'format_version': bundle['format_version'],
+        'type': 'delta',
+        'base_version': base['data_version'],
+        'data_version': bundle['data_version'],
+        'generated_at': bundle['generated_at'],
+        'operations': operations
+    }
+
+
+def apply_delta(base, delta):
+    """将增量应用到统计数据包上，返回新的数据包"""
+    if delta['base_version'] != base['data_version']:
+        raise ValueError(f"增量基于{delta['base_version']}期，与当前数据包{base['data_version']}期不符")
+
+    bundle = copy.deepcopy(base)
+    for operation in delta['operations']:
+        target = bundle
+        for key in operation['path'][:-1]:
+            target = target[key]
+        key = operation['path'][-1]
+        if 'prepend' in operation:
+            target[key] = (operation['prepend'] + target[key])[:operation['limit']]
+        else:
+            target[key] = operation['value']
+    bundle['data_version'] = delta['data_version']
+    bundle['generated_at'] = delta['generated_at']
+    return bundle
+
+
+def save_bundle(bundle, filename):
+    """保存数据包，文件名以.gz结尾时使用gzip压缩"""
+    data = json.dumps(bundle, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    opener = gzip.open if filename.endswith('.gz') else open
+    with opener(filename, 'wb') as f:
+        f.write(data)
+
+
+def load_bundle(filename):
+    """读取数据包"""
+    opener = gzip.open if filename.endswith('.gz') else open
+    with opener(filename, 'rb') as f:
+        return json.loads(f.read().decode('utf-8'))
+
+
+def export_daily(predictor, output_dir='kl8_stats', compress=True):
+    """导出当天的完整数据包，以及相对上一次导出的增量数据包
+
+    manifest.json记录最新版本和可用的增量文件，客户端据此选择下载完整包或增量包。
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    suffix = '.json.gz' if compress else '.json'
+    manifest_file = os.path.join(output_dir, 'manifest.json')
+
+    manifest = {'format_version': BUNDLE_FORMAT_VERSION, 'latest_version': None, 'full': None, 'deltas': []}
+    if os.path.exists(manifest_file):
+        with open(manifest_file, encoding='utf-8') as f:
+            manifest = json.load(f)
+
+    bundle = build_bundle(predictor)
+    version = bundle['data_version']
+    if version == manifest['latest_version']:
+        print(f"Bundle {version} already exported")
+        return manifest
+
+    # 与上一次的完整数据包比较生成增量
+    if manifest['full'] and manifest['format_version'] == BUNDLE_FORMAT_VERSION:
+        base = load_bundle(os.path.join(output_dir, manifest['full']))
+        delta = build_delta(base, bundle)
+        delta_name = f"kl8_stats_delta_{delta['base_version']}_{version}{suffix}"
+        save_bundle(delta, os.path.join(output_dir, delta_name))
+        manifest['deltas'].append({
+            'base_version': delta['base_version'],
+            'data_version': version,
+            'file': delta_name
+        })
+    else:
+        manifest['deltas'] = []
+
+    full_name = f"kl8_stats_{version}{suffix}"
+    save_bundle(bundle, os.path.join(output_dir, full_name))
+    manifest.update({
+        'format_version': BUNDLE_FORMAT_VERSION,
+        'latest_version': version,
+        'full': full_name
+    })
+    with open(manifest_file, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    print(f"Exported bundle {version} to {output_dir}")
+    return manifest
+
+
+def main():
+    from kl8_predictor import KL8Predictor
+
+    predictor = KL8Predictor()
+    export_daily(predictor)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+from kl8_predictor import KL8Predictor
+from kl8_export import build_bundle, build_delta, apply_delta
+
+
+def test_delta_rebuilds_next_bundle():
+    predictor = KL8Predictor()
+    latest = predictor.df.iloc[:2]
+    predictor.df = predictor.df.iloc[2:]
+    base = build_bundle(predictor)
+
+    for _, row in latest.iloc[::-1].iterrows():
+        predictor.ingest_draw(row['期号'], row['开奖日期'], row['numbers_list'])
+    bundle = build_bundle(predictor)
+    delta = build_delta(base, bundle)
+
+    assert apply_delta(base, delta) == bundle
+    recent = [op for op in delta['operations'] if op['path'] == ['recent_draws']]
+    assert len(recent) == 1 and len(recent[0]['prepend']) == 2
+
+
+def test_bundle_covers_client_analyses():
+    bundle = build_bundle(KL8Predictor(), recent_count=100)
+    assert len(bundle['recent_draws']) == 100
+    assert bundle['recent_draws'][0][0] == bundle['data_version']
+    assert set(bundle['trend_patterns']) == {'hot_to_cold', 'cold_to_hot', 'stable_numbers', 'volatile_numbers'}
+    assert {'mean', 'std', 'min', 'max'} <= set(bundle['number_patterns']['sum_range_stats'])
@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+from kl8_predictor import KL8Predictor
+
+AGGREGATES = [
+    'number_counts', 'pair_counts', 'day_counts', 'day_draws', 'weekday_counts', 'weekday_draws',
+    'last_seen', 'day_last_seen', 'weekday_last_seen', 'max_omission'
+]
+
+
+def ingested_predictor(new_draws=3):
+    """去掉最近new_draws期后逐期增量加入，并在加入前预热缓存"""
+    predictor = KL8Predictor()
+    latest = predictor.df.iloc[:new_draws]
+    predictor.df = predictor.df.iloc[new_draws:]
+    predictor.warm_cache()
+    for _, row in latest.iloc[::-1].iterrows():
+        assert predictor.ingest_draw(row['期号'], row['开奖日期'], row['numbers_list'])
+    return predictor
+
+
+def test_ingest_matches_full_rebuild():
+    full = KL8Predictor()
+    full.warm_cache()
+    incremental = ingested_predictor()
+
+    for name in AGGREGATES:
+        assert np.array_equal(getattr(full, name), getattr(incremental, name)), name
+    assert list(full.df['开奖号码']) == list(incremental.df['开奖号码'])
+
+    for days in (None, 3, 30):
+        for weight_recent in (True, False):
+            expected = full.analyze_frequency(days, weight_recent)
+            actual = incremental.analyze_frequency(days, weight_recent)
+            assert list(expected) == list(actual)
+            assert all(abs(expected[num] - actual[num]) < 1e-9 for num in expected)
+
+    for target_date in [None, '2025-03-24', '2025-03-27', '2024-02-29']:
+        assert full.analyze_historical_same_period(target_date) == incremental.analyze_historical_same_period(target_date)
+    assert full.analyze_number_patterns() == incremental.analyze_number_patterns()
+    assert full.analyze_trend_patterns() == incremental.analyze_trend_patterns()
+    assert full.find_best_strategy() == incremental.find_best_strategy()
+
+
+def test_duplicate_issue_is_ignored():
+    predictor = KL8Predictor()
+    latest = predictor.df.iloc[0]
+    draw_count = len(predictor.df)
+    assert not predictor.ingest_draw(latest['期号'], latest['开奖日期'], latest['numbers_list'])
+    assert len(predictor.df) == draw_count
+
+
+def test_cached_results_are_not_shared_with_callers():
+    predictor = KL8Predictor()
+    frequency = predictor.analyze_frequency(days=30)
+    original = frequency[1]
+    frequency[1] += 100
+    same_period = predictor.analyze_historical_same_period(pd.Timestamp('2025-03-27'))
+    same_period['same_day_freq'].clear()
+
+    assert predictor.analyze_frequency(days=30)[1] == original
+    assert predictor.analyze_historical_same_period(pd.Timestamp('2025-03-27'))['same_day_freq']
+
+
+def test_snapshot_loads_and_ingests_newer_draws(tmp_path):
+    lines = open('kl8_history.csv', encoding='utf-8').read().splitlines(keepends=True)
+    data_file = tmp_path / 'kl8_history.csv'
+    # 用去掉最近3期的数据生成快照，再写回完整CSV模拟每日同步后的状态
+    data_file.write_text(lines[0] + ''.join(lines[4:]), encoding='utf-8')
+    KL8Predictor(str(data_file)).save_snapshot()
+    data_file.write_text(''.join(lines), encoding='utf-8')
+
+    full = KL8Predictor()
+    full.warm_cache()
+    loaded = KL8Predictor(str(data_file))
+    assert loaded._df is None
+    assert loaded.get_latest_issue() == int(full.df['期号'].iloc[0])
+
+    for name in AGGREGATES:
+        assert np.array_equal(getattr(full, name), getattr(loaded, name)), name
+    assert loaded.get_recent_draws(5) == full.get_recent_draws(5)
+    assert loaded.get_calendar_stats()['day_recent'] == full.get_calendar_stats()['day_recent']
+    assert full.analyze_historical_same_period() == loaded.analyze_historical_same_period()
+    assert full.analyze_number_patterns() == loaded.analyze_number_patterns()
+    assert full.find_best_strategy() == loaded.find_best_strategy()
+    assert list(full.df['开奖号码']) == list(loaded.df['开奖号码'])
+
+
+def test_snapshot_mismatch_falls_back_to_csv(tmp_path):
+    lines = open('kl8_history.csv', encoding='utf-8').read().splitlines(keepends=True)
+    data_file = tmp_path / 'kl8_history.csv'
+    data_file.write_text(''.join(lines), encoding='utf-8')
+    KL8Predictor(str(data_file)).save_snapshot()
+    # 最新一期号码被更正后快照失效
+    issue_and_date, _ = lines[1].split(',"')
+    _, corrected = lines[2].split(',"')
+    data_file.write_text(lines[0] + issue_and_date + ',"' + corrected + ''.join(lines[2:]), encoding='utf-8')
+
+    loaded = KL8Predictor(str(data_file))
+    assert loaded._df is not None
+    assert loaded.get_recent_draws(1)[0]['numbers'] == [int(n) for n in corrected.strip().strip('"').split(',')]
@@ -1,25 +1,41 @@
 import pandas as pd
 import numpy as np
+import copy
+import csv
+import os
 from collections import Counter, defaultdict
 from datetime import datetime, timedelta
 import warnings
-import math
+from kl8_probability import hit_distribution, calibrate_weights, prize_vector
+from kl8_profiler import KL8Profiler
 warnings.filterwarnings('ignore')
 
+# 统计量快照格式版本，结构不兼容时递增
+SNAPSHOT_FORMAT_VERSION = 1
+
+# 快照中保存的统计量
+SNAPSHOT_AGGREGATES = [
+    'number_counts', 'pair_counts', 'day_counts', 'day_draws', 'weekday_counts', 'weekday_draws',
+    'last_seen', 'day_last_seen', 'weekday_last_seen', 'max_omission'
+]
+
 class KL8Predictor:
-    def __init__(self, data_file='kl8_history.csv'):
-        # 读取历史数据
-        self.df = pd.read_csv(data_file)
-        # 将开奖号码字符串转换为数字列表
-        self.df['numbers_list'] = self.df['开奖号码'].apply(lambda x: [int(n) for n in x.split(',')])
-        # 转换日期
-        self.df['开奖日期'] = pd.to_datetime(self.df['开奖日期'])
-        # 添加日期相关特征
-        self.df['day_of_week'] = self.df['开奖日期'].dt.dayofweek
-        self.df['day_of_month'] = self.df['开奖日期'].dt.day
-        self.df['month'] = self.df['开奖日期'].dt.month
-        # 按日期降序排序
-        self.df = self.df.sort_values('开奖日期', ascending=False)
+    def __init__(self, data_file='kl8_history.csv', snapshot_file=None, use_snapshot=True):
+        """初始化预测器
+
+        snapshot_file默认为与data_file同名的.npz文件。快照存在且与CSV一致时直接加载统计量，
+        只增量加入CSV中比快照更新的开奖，否则读取CSV全量构建。
+        """
+        self.data_file = data_file
+        self.snapshot_file = snapshot_file or os.path.splitext(data_file)[0] + '.npz'
+        
+        # 增量维护的统计量和分析结果缓存，首次使用时构建
+        self._df = None
+        self._aggregates_valid = False
+        self._cache = {}
+        
+        # 性能分析器，默认关闭
+        self.profiler = None
         
         # 中文数字映射
         self.chinese_nums = {
@@ -41,6 +57,306 @@ class KL8Predictor:
             '选十': {'中10': 50000, '中9': 800, '中8': 120, '中7': 30, '中6': 8, '中5': 4}
         }
         
+        if not (use_snapshot and self._load_snapshot()):
+            self.df = self._read_history(data_file)
+        
+    @property
+    def df(self):
+        """历史开奖数据（按日期降序），增量加入新开奖后在首次访问时由开奖矩阵重新生成"""
+        if self._df is None:
+            self._df = self._frame_from_draws()
+        return self._df
+        
+    @df.setter
+    def df(self, value):
+        # 替换数据源后统计量需要重新构建
+        self._df = value
+        self._aggregates_valid = False
+        
+    def _read_history(self, data_file):
+        """读取历史数据CSV"""
+        df = pd.read_csv(data_file)
+        # 将开奖号码字符串转换为数字列表
+        df['numbers_list'] = df['开奖号码'].apply(lambda x: [int(n) for n in x.split(',')])
+        # 转换日期
+        df['开奖日期'] = pd.to_datetime(df['开奖日期'])
+        # 添加日期相关特征
+        df['day_of_week'] = df['开奖日期'].dt.dayofweek
+        df['day_of_month'] = df['开奖日期'].dt.day
+        df['month'] = df['开奖日期'].dt.month
+        # 按日期降序排序
+        return df.sort_values('开奖日期', ascending=False)
+        
+    def _frame_from_draws(self):
+        """由按时间升序保存的开奖矩阵生成按日期降序的DataFrame"""
+        rows = range(self._draw_total - 1, -1, -1)
+        numbers_list = [self._draw_numbers(row) for row in rows]
+        df = pd.DataFrame({
+            '期号': self._draw_issues[:self._draw_total][::-1],
+            '开奖日期': pd.to_datetime(self._draw_ordinals[:self._draw_total][::-1].astype('datetime64[D]')).astype('datetime64[ns]'),
+            '开奖号码': [','.join(map(str, numbers)) for numbers in numbers_list],
+            'numbers_list': numbers_list
+        })
+        df['day_of_week'] = df['开奖日期'].dt.dayofweek
+        df['day_of_month'] = df['开奖日期'].dt.day
+        df['month'] = df['开奖日期'].dt.month
+        return df
+        
+    def enable_profiling(self, profiler=None):
+        """开启性能分析，记录各方法的调用次数、耗时及数据复制情况"""
+        return (profiler or KL8Profiler()).attach(self)
+        
+    def disable_profiling(self):
+        """关闭性能分析，恢复原始方法"""
+        if self.profiler is not None:
+            self.profiler.detach(self)
+        
+    def _build_aggregates(self):
+        """根据当前数据全量构建统计量"""
+        # 按时间升序排列的开奖矩阵，用于窗口统计
+        ordered = self.df.iloc[::-1]
+        count = len(ordered)
+        self._draw_matrix = np.zeros((max(count, 1) * 2, 80))
+        self._draw_ordinals = np.zeros(max(count, 1) * 2, dtype=np.int64)
+        self._draw_issues = np.zeros(max(count, 1) * 2, dtype=np.int64)
+        for row, numbers in enumerate(ordered['numbers_list']):
+            self._draw_matrix[row, np.asarray(numbers) - 1] = 1
+        self._draw_ordinals[:count] = ordered['开奖日期'].values.astype('datetime64[D]').astype(np.int64)
+        self._draw_issues[:count] = ordered['期号'].values
+        self._draw_total = count
+        
+        matrix = self._draw_matrix[:count]
+        day_of_month = ordered['开奖日期'].dt.day.values
+        day_of_week = ordered['开奖日期'].dt.dayofweek.values
+        
+        # 全量频率、号码对共现次数
+        self.number_counts = matrix.sum(axis=0).astype(np.int64)
+        self.pair_counts = (matrix.T @ matrix).astype(np.int64)
+        
+        # 同日期、同星期的频率表
+        self.day_counts = np.zeros((32, 80), dtype=np.int64)
+        self.day_draws = np.zeros(32, dtype=np.int64)
+        self.weekday_counts = np.zeros((7, 80), dtype=np.int64)
+        self.weekday_draws = np.zeros(7, dtype=np.int64)
+        np.add.at(self.day_counts, day_of_month, matrix.astype(np.int64))
+        np.add.at(self.day_draws, day_of_month, 1)
+        np.add.at(self.weekday_counts, day_of_week, matrix.astype(np.int64))
+        np.add.at(self.weekday_draws, day_of_week, 1)
+        
+        # 每个日期最近两期的开奖号码
+        self._day_recent = defaultdict(list)
+        for numbers, day in zip(self.df['numbers_list'], self.df['开奖日期'].dt.day):
+            if len(self._day_recent[day]) < 2:
+                self._day_recent[day].append(numbers)
+        
+        # 每个号码最近一次出现的位置（全量及同日期、同星期）和历史最大遗漏期数
+        self.last_seen = np.full(80, -1, dtype=np.int64)
+        self.day_last_seen = np.full((32, 80), -1, dtype=np.int64)
+        self.weekday_last_seen = np.full((7, 80), -1, dtype=np.int64)
+        self.max_omission = np.zeros(80, dtype=np.int64)
+        for row in range(count):
+            drawn = self._draw_matrix[row] > 0
+            self.max_omission[drawn] = np.maximum(self.max_omission[drawn], row - self.last_seen[drawn] - 1)
+            self.last_seen[drawn] = row
+            self.day_last_seen[day_of_month[row], drawn] = row
+            self.weekday_last_seen[day_of_week[row], drawn] = row
+        
+        self._issues = set(int(issue) for issue in self.df['期号'])
+        self._aggregates_valid = True
+        self._cache = {}
+        
+    def _ensure_aggregates(self):
+        """数据源被替换后重新构建统计量"""
+        if not self._aggregates_valid:
+            self._build_aggregates()
+        
+    def _draw_numbers(self, row):
+        """开奖矩阵第row行（按时间升序）的开奖号码"""
+        return (np.flatnonzero(self._draw_matrix[row]) + 1).tolist()
+        
+    def _latest_date(self):
+        """最近一期的开奖日期"""
+        self._ensure_aggregates()
+        return pd.Timestamp(np.datetime64(int(self._draw_ordinals[self._draw_total - 1]), 'D'))
+        
+    def _add_draw_to_aggregates(self, issue, date, numbers):
+        """将一期最新开奖加入统计量，复杂度O(80²)"""
+        if self._draw_total == len(self._draw_ordinals):
+            self._draw_matrix = np.concatenate([self._draw_matrix, np.zeros_like(self._draw_matrix)])
+            self._draw_ordinals = np.concatenate([self._draw_ordinals, np.zeros_like(self._draw_ordinals)])
+            self._draw_issues = np.concatenate([self._draw_issues, np.zeros_like(self._draw_issues)])
+        
+        row = self._draw_total
+        index = np.asarray(numbers) - 1
+        self._draw_matrix[row, index] = 1
+        self._draw_ordinals[row] = np.datetime64(date.date(), 'D').astype(np.int64)
+        self._draw_issues[row] = issue
+        self._draw_total += 1
+        self._issues.add(issue)
+        
+        self.number_counts[index] += 1
+        self.pair_counts[np.ix_(index, index)] += 1
+        self.day_counts[date.day, index] += 1
+        self.day_draws[date.day] += 1
+        self.weekday_counts[date.dayofweek, index] += 1
+        self.weekday_draws[date.dayofweek] += 1
+        self._day_recent[date.day] = [numbers] + self._day_recent[date.day][:1]
+        self.max_omission[index] = np.maximum(self.max_omission[index], row - self.last_seen[index] - 1)
+        self.last_seen[index] = row
+        self.day_last_seen[date.day, index] = row
+        self.weekday_last_seen[date.dayofweek, index] = row
+        
+    def _counter_by_recency(self, counts, last_seen, cast=int):
+        """按号码最近一次出现的先后构建Counter，与按日期降序逐期统计时的插入顺序一致"""
+        order = np.lexsort((np.arange(80), -last_seen))
+        return Counter({int(num) + 1: cast(counts[num]) for num in order if counts[num]})
+        
+    def _cache_get(self, key):
+        """取出缓存结果的副本，避免调用方修改缓存"""
+        return copy.deepcopy(self._cache[key])
+        
+    def _cache_set(self, key, value):
+        """保存分析结果到缓存，返回其副本"""
+        self._cache[key] = value
+        return copy.deepcopy(value)
+        
+    def _invalidate_cache(self, date):
+        """新开奖到来后，清除受影响的分析结果缓存"""
+        for key in list(self._cache):
+            if key[0] == 'same_period':
+                # 同期分析只依赖同日期、同星期的数据
+                if key[1] != date.day and key[2] != date.dayofweek:
+                    continue
+            del self._cache[key]
+        
+    def ingest_draw(self, issue, date, numbers):
+        """增量加入一期新开奖数据
+
+        更新所有维护的统计量并清除受影响的缓存，返回是否为新数据（重复期号将被忽略）。
+        最新开奖只追加到开奖矩阵，复杂度O(80²)；df在下次访问时才重新生成（O(N)）。
+        补录早于最近一期的历史数据时按日期重新排序后全量重建，复杂度O(N)。
+        """
+        self._ensure_aggregates()
+        issue = int(issue)
+        date = pd.Timestamp(date).normalize()
+        numbers = sorted(int(n) for n in numbers)
+        if len(set(numbers)) != 20 or numbers[0] < 1 or numbers[-1] > 80:
+            raise ValueError(f"开奖号码无效: {numbers}")
+        if issue in self._issues:
+            return False
+        
+        if self._draw_total and date < self._latest_date():
+            # 补录历史数据，按日期重新排序后全量重建
+            row = pd.DataFrame([{
+                '期号': issue,
+                '开奖日期': date,
+                '开奖号码': ','.join(map(str, numbers)),
+                'numbers_list': numbers,
+                'day_of_week': date.dayofweek,
+                'day_of_month': date.day,
+                'month': date.month
+            }])
+            self.df = pd.concat([self.df, row], ignore_index=True).sort_values('开奖日期', ascending=False)
+            self._build_aggregates()
+            return True
+        
+        self._add_draw_to_aggregates(issue, date, numbers)
+        self._df = None
+        self._invalidate_cache(date)
+        return True
+        
+    def get_latest_issue(self):
+        """获取已加入的最新一期期号，没有数据时返回0"""
+        self._ensure_aggregates()
+        return int(self._draw_issues[self._draw_total - 1]) if self._draw_total else 0
+        
+    def save_snapshot(self, snapshot_file=None):
+        """保存维护的统计量和开奖矩阵，下次创建预测器时直接加载，无需重新扫描全部历史数据"""
+        self._ensure_aggregates()
+        count = self._draw_total
+        day_recent = np.zeros((32, 2, 20), dtype=np.int64)
+        for day, draws in self._day_recent.items():
+            for position, numbers in enumerate(draws):
+                day_recent[day, position] = numbers
+        
+        snapshot_file = snapshot_file or self.snapshot_file
+        with open(snapshot_file, 'wb') as f:
+            np.savez_compressed(
+                f,
+                format_version=SNAPSHOT_FORMAT_VERSION,
+                draws=self._draw_matrix[:count].astype(np.uint8),
+                ordinals=self._draw_ordinals[:count],
+                issues=self._draw_issues[:count],
+                day_recent=day_recent,
+                **{name: getattr(self, name) for name in SNAPSHOT_AGGREGATES}
+            )
+        print(f"Saved snapshot of {count} draws (latest issue {self.get_latest_issue()}) to {snapshot_file}")
+        
+    def _load_snapshot(self):
+        """加载统计量快照，并增量加入CSV中比快照更新的开奖
+
+        CSV按期号降序保存，只读取到快照的最新一期为止；该期与快照不一致时返回False，改为全量构建。
+        """
+        if not os.path.exists(self.snapshot_file) or not os.path.exists(self.data_file):
+            return False
+        try:
+            with np.load(self.snapshot_file) as data:
+                snapshot = {name: data[name] for name in data.files}
+        except (OSError, ValueError, KeyError):
+            return False
+        if int(snapshot.get('format_version', -1)) != SNAPSHOT_FORMAT_VERSION or not len(snapshot['issues']):
+            return False
+        
+        latest_issue = int(snapshot['issues'][-1])
+        latest_numbers = ','.join(map(str, np.flatnonzero(snapshot['draws'][-1]) + 1))
+        new_draws = []
+        matched = False
+        with open(self.data_file, newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            for issue, date, numbers in reader:
+                if int(issue) <= latest_issue:
+                    matched = int(issue) == latest_issue and numbers == latest_numbers
+                    break
+                new_draws.append((issue, date, numbers))
+        if not matched:
+            return False
+        
+        count = len(snapshot['issues'])
+        capacity = count * 2
+        self._draw_matrix = np.zeros((capacity, 80))
+        self._draw_ordinals = np.zeros(capacity, dtype=np.int64)
+        self._draw_issues = np.zeros(capacity, dtype=np.int64)
+        self._draw_matrix[:count] = snapshot['draws']
+        self._draw_ordinals[:count] = snapshot['ordinals']
+        self._draw_issues[:count] = snapshot['issues']
+        self._draw_total = count
+        for name in SNAPSHOT_AGGREGATES:
+            setattr(self, name, snapshot[name])
+        self._day_recent = defaultdict(list)
+        for day in range(32):
+            for numbers in snapshot['day_recent'][day]:
+                if numbers[0]:
+                    self._day_recent[day].append(numbers.tolist())
+        self._issues = set(self._draw_issues[:count].tolist())
+        self._aggregates_valid = True
+        self._cache = {}
+        
+        # 从旧到新加入快照之后的开奖
+        for issue, date, numbers in reversed(new_draws):
+            self.ingest_draw(issue, date, [int(n) for n in numbers.split(',')])
+        return True
+        
+    def warm_cache(self):
+        """预先计算下一期预测所需的分析结果"""
+        self._ensure_aggregates()
+        self.analyze_frequency(weight_recent=True)
+        self.analyze_frequency(days=30, weight_recent=False)
+        self.analyze_historical_same_period()
+        self.analyze_number_patterns()
+        self.analyze_trend_patterns()
+        self.find_best_strategy()
+        
     def get_number_from_play_type(self, play_type):
         """从玩法名称中获取选号数量"""
         chinese_num = play_type[1:]  # 去掉'选'字
@@ -48,27 +364,31 @@ class KL8Predictor:
         
     def analyze_frequency(self, days=None, weight_recent=True):
         """分析号码频率，支持全量数据分析和加权分析"""
+        self._ensure_aggregates()
+        if not days and not weight_recent:
+            return self._counter_by_recency(self.number_counts, self.last_seen)
+        
+        key = ('frequency', days, weight_recent)
+        if key in self._cache:
+            return self._cache_get(key)
+        
+        matrix = self._draw_matrix[:self._draw_total]
+        ordinals = self._draw_ordinals[:self._draw_total]
+        latest = ordinals.max() if self._draw_total else 0
         if days:
-            recent_date = self.df['开奖日期'].max() - timedelta(days=days)
-            data = self.df[self.df['开奖日期'] >= recent_date]
-        else:
-            data = self.df
+            selected = ordinals >= latest - days
+            matrix, ordinals = matrix[selected], ordinals[selected]
+            if self.profiler is not None:
+                self.profiler.record_allocation('analyze_frequency.mask', matrix)
             
-        # 统计所有号码出现次数
-        frequency = Counter()
-        for idx, row in data.iterrows():
-            numbers = row['numbers_list']
-            if weight_recent:
-                # 根据距离当前日期的天数计算权重
-                days_diff = (data['开奖日期'].max() - row['开奖日期']).days
-                weight = 1 / (days_diff + 1)  # 避免除以0
-            else:
-                weight = 1
-                
-            for num in numbers:
-                frequency[num] += weight
-                
-        return frequency
+        if weight_recent:
+            # 根据距离当前日期的天数计算权重
+            weights = 1 / (latest - ordinals + 1)  # 避免除以0
+            frequency = self._counter_by_recency(weights @ matrix, self.last_seen, float)
+        else:
+            frequency = self._counter_by_recency(matrix.sum(axis=0), self.last_seen)
+        
+        return self._cache_set(key, frequency)
     
     def analyze_cold_numbers(self, days=None):
         """分析未出现的号码"""
@@ -78,8 +398,9 @@ class KL8Predictor:
     
     def analyze_historical_same_period(self, target_date=None):
         """分析历史同期数据"""
+        self._ensure_aggregates()
         if target_date is None or pd.isna(target_date):
-            target_date = self.df['开奖日期'].max() + timedelta(days=1)
+            target_date = self._latest_date() + timedelta(days=1)
             
         # 获取目标日期的特征
         if isinstance(target_date, pd.Timestamp):
@@ -99,21 +420,14 @@ class KL8Predictor:
                 target_month = current_date.month
                 target_weekday = int(current_date.dayofweek)
         
-        # 分析同一日期的历史数据
-        same_day_data = self.df[self.df['day_of_month'] == target_day]
-        same_weekday_data = self.df[self.df['day_of_week'] == target_weekday]
+        key = ('same_period', target_day, target_weekday)
+        if key in self._cache:
+            return self._cache_get(key)
         
-        # 统计号码出现频率
-        day_frequency = Counter()
-        weekday_frequency = Counter()
-        
-        for numbers in same_day_data['numbers_list']:
-            for num in numbers:
-                day_frequency[num] += 1
-                
-        for numbers in same_weekday_data['numbers_list']:
-            for num in numbers:
-                weekday_frequency[num] += 1
+        # 从同日期、同星期的频率表中统计号码出现频率
+        day_frequency = self._counter_by_recency(self.day_counts[target_day], self.day_last_seen[target_day])
+        weekday_frequency = self._counter_by_recency(self.weekday_counts[target_weekday], self.weekday_last_seen[target_weekday])
+        same_day_recent = self._day_recent.get(target_day, [])
                 
         # 获取最常出现的号码
         top_day_numbers = sorted(day_frequency.items(), key=lambda x: x[1], reverse=True)[:10]
@@ -125,13 +439,13 @@ class KL8Predictor:
         
         # 分析重合点
         overlap_numbers = set()
-        if len(same_day_data) >= 2:
-            previous_numbers = set(same_day_data.iloc[1]['numbers_list'])
-            current_numbers = set(same_day_data.iloc[0]['numbers_list'])
+        if len(same_day_recent) >= 2:
+            previous_numbers = set(same_day_recent[1])
+            current_numbers = set(same_day_recent[0])
             overlap_numbers = previous_numbers.intersection(current_numbers)
         
         # 分析相邻数据的奇偶性
-        last_draw = same_day_data.iloc[0]['numbers_list'] if not same_day_data.empty else []
+        last_draw = same_day_recent[0] if same_day_recent else []
         odd_count = sum(1 for num in last_draw if num % 2 == 1)
         even_count = len(last_draw) - odd_count
         
@@ -167,11 +481,11 @@ class KL8Predictor:
                     current_consecutive = 1
             max_consecutive = max(max_consecutive, current_consecutive)
         
-        return {
+        result = {
             'same_day_freq': day_frequency,
             'same_weekday_freq': weekday_frequency,
-            'same_day_count': len(same_day_data),
-            'same_weekday_count': len(same_weekday_data),
+            'same_day_count': int(self.day_draws[target_day]),
+            'same_weekday_count': int(self.weekday_draws[target_weekday]),
             'top_day_numbers': top_day_numbers,
             'top_weekday_numbers': top_weekday_numbers,
             'day_avg_freq': day_avg,
@@ -184,58 +498,141 @@ class KL8Predictor:
             'zone_distribution': zones,
             'max_consecutive': max_consecutive
         }
+        return self._cache_set(key, result)
+    
+    def get_draw_count(self):
+        """获取历史开奖总期数"""
+        self._ensure_aggregates()
+        return self._draw_total
     
-    def calculate_expected_value(self, play_type):
-        """计算某种玩法的期望值"""
+    def get_number_counts(self):
+        """获取每个号码的历史出现次数（下标0对应号码1）"""
+        self._ensure_aggregates()
+        return self.number_counts.copy()
+    
+    def get_calendar_stats(self):
+        """获取同日期、同星期的频率表，以及每个日期最近两期的开奖号码"""
+        self._ensure_aggregates()
+        return {
+            'day_counts': self.day_counts.copy(),
+            'day_draws': self.day_draws.copy(),
+            'day_recent': [[list(numbers) for numbers in self._day_recent.get(day, [])] for day in range(32)],
+            'weekday_counts': self.weekday_counts.copy(),
+            'weekday_draws': self.weekday_draws.copy()
+        }
+    
+    def get_recent_draws(self, count=100):
+        """获取最近count期的开奖数据（按日期降序）"""
+        self._ensure_aggregates()
+        return [
+            {
+                'issue': int(self._draw_issues[row]),
+                'date': str(np.datetime64(int(self._draw_ordinals[row]), 'D')),
+                'numbers': self._draw_numbers(row)
+            }
+            for row in range(self._draw_total - 1, max(self._draw_total - count, 0) - 1, -1)
+        ]
+    
+    def get_omission_stats(self):
+        """获取每个号码的当前遗漏期数和历史最大遗漏期数"""
+        self._ensure_aggregates()
+        current = self._draw_total - 1 - self.last_seen
+        return {
+            'current': current,
+            'max': np.maximum(self.max_omission, current)
+        }
+    
+    def get_cooccurrence_top(self, top_k=10):
+        """获取每个号码共同出现次数最多的top_k个号码"""
+        self._ensure_aggregates()
+        pairs = self.pair_counts.copy()
+        np.fill_diagonal(pairs, -1)
+        top = np.argsort(-pairs, axis=1, kind='stable')[:, :top_k]
+        return {
+            num + 1: [(int(other) + 1, int(pairs[num, other])) for other in top[num]]
+            for num in range(80)
+        }
+    
+    def get_number_probabilities(self, days=None):
+        """根据号码频率估算每个号码的开出概率（总和为20）"""
+        frequency = self.analyze_frequency(days, weight_recent=False)
+        counts = np.array([frequency.get(num, 0) for num in range(1, 81)], dtype=float)
+        if counts.sum() == 0:
+            return np.full(80, 0.25)
+        return counts * 20 / counts.sum()
+    
+    def get_number_weights(self, days=None):
+        """获取加权开奖模型下每个号码的抽样权重"""
+        key = ('weights', days)
+        if key in self._cache:
+            return self._cache_get(key)
+        return self._cache_set(key, calibrate_weights(self.get_number_probabilities(days)))
+    
+    def calculate_hit_distribution(self, tickets, weights=None):
+        """计算多注号码在加权开奖模型下的精确中奖个数分布"""
+        if weights is None:
+            weights = self.get_number_weights()
+        return hit_distribution(tickets, weights)
+    
+    def select_strategy_numbers(self, numbers_count, probabilities=None):
+        """选出开出概率最高的若干个号码作为玩法的投注号码"""
+        if probabilities is None:
+            probabilities = self.get_number_probabilities()
+        order = np.argsort(-probabilities, kind='stable')[:numbers_count]
+        return sorted(int(idx) + 1 for idx in order)
+    
+    def expected_value_from_distribution(self, play_type, distribution):
+        """根据中奖个数分布计算某种玩法每注的期望收益"""
         numbers_count = self.get_number_from_play_type(play_type)
-        total_draws = self.df.shape[0]  # 总开奖次数
-        prize_info = self.prize_settings[play_type]
-        
-        # 计算各种中奖情况的概率和期望值
-        expected_value = 0
+        prizes = prize_vector(self.prize_settings[play_type], numbers_count)
         cost = 2  # 每注2元
-        
-        # 计算组合数
-        def nCr(n, r):
-            return math.factorial(n) // (math.factorial(r) * math.factorial(n - r))
-        
-        # 计算理论概率和实际概率的加权平均
-        for hit_count, prize in prize_info.items():
-            hit_num = int(hit_count[1:])  # 提取中奖个数
-            
-            # 理论概率
-            theoretical_prob = (nCr(20, hit_num) * nCr(60, numbers_count - hit_num)) / nCr(80, numbers_count)
-            
-            # 实际概率（基于历史数据）
-            hit_times = 0
-            for numbers in self.df['numbers_list']:
-                if len(set(numbers[:numbers_count]).intersection(set(numbers))) == hit_num:
-                    hit_times += 1
-            empirical_prob = hit_times / total_draws
-            
-            # 使用加权平均（给予历史数据更高的权重）
-            probability = 0.3 * theoretical_prob + 0.7 * empirical_prob
-            expected_value += probability * prize
-        
-        return expected_value - cost
+        return float(distribution[:numbers_count + 1] @ prizes) - cost
+    
+    def calculate_expected_value(self, play_type, numbers=None, weights=None):
+        """计算某种玩法的期望值（基于加权开奖模型的精确中奖分布）"""
+        if numbers is None:
+            numbers = self.select_strategy_numbers(self.get_number_from_play_type(play_type))
+        distribution = self.calculate_hit_distribution([numbers], weights)[0]
+        return self.expected_value_from_distribution(play_type, distribution)
     
     def find_best_strategy(self):
         """找出期望值最高的玩法"""
+        key = ('strategy',)
+        if key in self._cache:
+            return self._cache_get(key)
+        
+        probabilities = self.get_number_probabilities()
+        weights = self.get_number_weights()
+        
+        # 所有玩法的投注号码一次性计算中奖分布
+        play_types = list(self.prize_settings.keys())
+        tickets = [
+            self.select_strategy_numbers(self.get_number_from_play_type(play_type), probabilities)
+            for play_type in play_types
+        ]
+        distributions = hit_distribution(tickets, weights)
+        
         strategies = []
-        for play_type in self.prize_settings.keys():
-            ev = self.calculate_expected_value(play_type)
+        for play_type, numbers, distribution in zip(play_types, tickets, distributions):
             strategies.append({
                 'play_type': play_type,
-                'expected_value': ev,
-                'numbers_count': self.get_number_from_play_type(play_type)
+                'expected_value': self.expected_value_from_distribution(play_type, distribution),
+                'numbers_count': len(numbers),
+                'numbers': numbers
             })
         
-        return sorted(strategies, key=lambda x: x['expected_value'], reverse=True)
+        return self._cache_set(key, sorted(strategies, key=lambda x: x['expected_value'], reverse=True))
     
     def analyze_number_patterns(self, days=30):
         """分析号码组合模式"""
-        recent_date = self.df['开奖日期'].max() - timedelta(days=days)
-        recent_data = self.df[self.df['开奖日期'] >= recent_date]
+        self._ensure_aggregates()
+        key = ('patterns', days)
+        if key in self._cache:
+            return self._cache_get(key)
+        
+        # 开奖矩阵按时间升序，最近days天的开奖位于末尾
+        ordinals = self._draw_ordinals[:self._draw_total]
+        start = int(np.searchsorted(ordinals, ordinals[-1] - days)) if self._draw_total else 0
         
         patterns = {
             'consecutive_pairs': defaultdict(int),  # 连号对
@@ -245,8 +642,8 @@ class KL8Predictor:
             'zone_combinations': defaultdict(int)   # 分区组合
         }
         
-        for numbers in recent_data['numbers_list']:
-            sorted_nums = sorted(numbers)
+        for row in range(self._draw_total - 1, start - 1, -1):
+            sorted_nums = self._draw_numbers(row)
             
             # 分析连号对
             for i in range(len(sorted_nums)-1):
@@ -296,10 +693,14 @@ class KL8Predictor:
             'common_zone_combinations': sorted(patterns['zone_combinations'].items(), key=lambda x: x[1], reverse=True)[:5]
         }
         
-        return result
+        return self._cache_set(key, result)
 
     def analyze_trend_patterns(self):
         """分析号码走势模式"""
+        self._ensure_aggregates()
+        if ('trends',) in self._cache:
+            return self._cache_get(('trends',))
+        
         trends = {
             'hot_to_cold': [],  # 热号转冷号
             'cold_to_hot': [],  # 冷号转热号
@@ -327,11 +728,11 @@ class KL8Predictor:
             else:  # 波动
                 trends['volatile_numbers'].append(num)
         
-        return trends
+        return self._cache_set(('trends',), trends)
 
     def predict_next_numbers(self, predict_count=10):
         """预测下一期可能出现的号码"""
-        next_draw_date = self.df['开奖日期'].max() + timedelta(days=1)
+        next_draw_date = self._latest_date() + timedelta(days=1)
         
         # 1. 分析全量数据（带权重）
         all_time_freq = self.analyze_frequency(weight_recent=True)
@@ -343,7 +744,7 @@ class KL8Predictor:
         historical_same_period = self.analyze_historical_same_period(next_draw_date)
         
         # 4. 获取上期开奖号码
-        last_draw = self.df['numbers_list'].iloc[0]
+        last_draw = self._draw_numbers(self._draw_total - 1)
         last_draw_set = set(last_draw)
         
         # 5. 分析号码组合模式
@@ -450,7 +851,8 @@ class KL8Predictor:
     
     def generate_prediction_report(self):
         """生成预测报告"""
-        next_draw_date = self.df['开奖日期'].max() + timedelta(days=1)
+        next_draw_date = self._latest_date() + timedelta(days=1)
+        last_draw = self.get_recent_draws(1)[0]
         
         # 1. 预测号码
         predicted_numbers = self.predict_next_numbers(10)
@@ -467,8 +869,8 @@ class KL8Predictor:
             'best_strategies': best_strategies[:3],  # 前三个最优策略
             'prediction_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
             'next_draw_date': next_draw_date.strftime('%Y-%m-%d'),
-            'last_draw_date': self.df['开奖日期'].iloc[0].strftime('%Y-%m-%d'),
-            'last_draw_numbers': self.df['numbers_list'].iloc[0],
+            'last_draw_date': last_draw['date'],
+            'last_draw_numbers': last_draw['numbers'],
             'historical_data': historical_data
         }
         
@@ -481,7 +883,7 @@ def main():
     # 生成多组预测号码
     print("\n=== 快乐8预测报告 ===")
     print(f"预测时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"上期开奖号码: {predictor.df['numbers_list'].iloc[0]}")
+    print(f"上期开奖号码: {predictor.get_recent_draws(1)[0]['numbers']}")
     
     print("\n生成5组预测号码:")
     for i in range(5):
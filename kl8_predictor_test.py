@@ -1,6 +1,10 @@
 import pandas as pd
+import numpy as np
 from datetime import datetime
+from statistics import NormalDist
 from kl8_predictor import KL8Predictor
+from kl8_probability import hit_distribution, wilson_interval, binomial_upper_tail
+from kl8_profiler import KL8Profiler
 import copy
 
 class KL8PredictorTester:
@@ -12,11 +16,25 @@ class KL8PredictorTester:
         self.original_df['numbers_list'] = self.original_df['开奖号码'].apply(lambda x: [int(n) for n in x.split(',')])
         # 按日期降序排序
         self.original_df = self.original_df.sort_values('开奖日期', ascending=False)
+        # 性能分析器，默认关闭
+        self.profiler = None
+        
+    def enable_profiling(self, profiler=None):
+        """开启性能分析，测试中创建的预测器共用同一个分析器"""
+        return (profiler or KL8Profiler()).attach(self)
+        
+    def disable_profiling(self):
+        """关闭性能分析，恢复原始方法"""
+        if self.profiler is not None:
+            self.profiler.detach(self)
         
     def test_single_draw(self, test_date, predictor):
         """测试单期预测结果"""
         # 获取实际开奖号码
-        actual_numbers = self.original_df[self.original_df['开奖日期'] == test_date]['numbers_list'].iloc[0]
+        test_date_data = self.original_df[self.original_df['开奖日期'] == test_date]
+        if self.profiler is not None:
+            self.profiler.record_allocation('test_single_draw.mask', test_date_data)
+        actual_numbers = test_date_data['numbers_list'].iloc[0]
         actual_numbers_set = set(actual_numbers)
         
         # 生成5组预测号码
@@ -52,6 +70,8 @@ class KL8PredictorTester:
             
             # 创建仅包含测试日期之前数据的DataFrame
             test_df = self.original_df[self.original_df['开奖日期'] < test_date].copy()
+            if self.profiler is not None:
+                self.profiler.record_allocation('test_multiple_draws.copy', test_df)
             
             if len(test_df) == 0:
                 print(f"\n警告：{test_date}之前没有历史数据，跳过该期测试")
@@ -59,6 +79,8 @@ class KL8PredictorTester:
                 
             # 创建新的预测器实例
             predictor = KL8Predictor()
+            if self.profiler is not None:
+                predictor.enable_profiling(self.profiler)
             predictor.df = test_df  # 替换数据源
             # 重新初始化日期相关特征
             predictor.df['day_of_week'] = predictor.df['开奖日期'].dt.dayofweek.astype(int)
@@ -71,6 +93,7 @@ class KL8PredictorTester:
         
         print("\n\n测试完成！生成测试报告...")
         self.generate_test_report(results)
+        return results
         
     def generate_test_report(self, results):
         """生成测试报告"""
@@ -117,11 +140,59 @@ class KL8PredictorTester:
         
         print("\n注意：本测试结果仅供参考，购彩需理性，请注意控制投注金额。")
 
+    def compare_with_random(self, results, weights=None, confidence=0.95):
+        """将回测命中分布与随机开奖下的精确零分布进行对比
+
+        零分布为每组预测号码在随机开奖（weights为None时均匀开奖）下的精确中奖分布的平均，
+        置信区间和p值按回测的总预测组数计算。同一期的多组预测共用一次开奖，并不完全独立，
+        因此区间略偏乐观。
+        """
+        if not results:
+            print("\n没有回测结果，无法与随机开奖对比")
+            return None
+        
+        tickets = [prediction for result in results for prediction in result['predictions']]
+        hit_counts = [hits for result in results for hits in result['hit_counts']]
+        total_predictions = len(hit_counts)
+        observed = np.bincount(hit_counts, minlength=11)
+        null = hit_distribution(tickets, weights).mean(axis=0)
+        null = np.pad(null, (0, 11 - len(null)))
+        
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        actual = observed / total_predictions
+        ci_low, ci_high = wilson_interval(actual, total_predictions, z)
+        
+        print("\n=== 随机开奖对比 ===")
+        print(f"回测预测组数: {total_predictions}组")
+        comparison = []
+        for hits in range(11):
+            p_value = binomial_upper_tail(total_predictions, int(observed[hits]), float(null[hits]))
+            comparison.append({
+                'hits': hits,
+                'backtest': float(actual[hits]),
+                'ci_low': float(ci_low[hits]),
+                'ci_high': float(ci_high[hits]),
+                'random': float(null[hits]),
+                'p_value': p_value
+            })
+            print(f"{hits}个号码命中: 回测{actual[hits]*100:.1f}% ({confidence:.0%}区间: {ci_low[hits]*100:.1f}% - {ci_high[hits]*100:.1f}%), "
+                  f"随机{null[hits]*100:.1f}%, P(≥回测次数)={p_value:.3g}")
+        
+        # 命中5个及以上的比例
+        hit_5_plus = int(observed[5:].sum())
+        null_5_plus = float(null[5:].sum())
+        p_value = binomial_upper_tail(total_predictions, hit_5_plus, null_5_plus)
+        print(f"\n命中5个及以上: 回测{hit_5_plus/total_predictions*100:.1f}%, 随机{null_5_plus*100:.1f}%, P(≥回测次数)={p_value:.3g}")
+        
+        return {'comparison': comparison, 'hit_5_plus_p_value': p_value}
+
 def main():
     # 创建测试器实例
     tester = KL8PredictorTester()
     # 执行测试
-    tester.test_multiple_draws(500)
+    results = tester.test_multiple_draws(500)
+    # 与随机开奖对比，判断命中率是否优于随机
+    tester.compare_with_random(results)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
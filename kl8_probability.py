@@ -0,0 +1,114 @@
+import math
+import numpy as np
+
+# 快乐8基本参数：从80个号码中开出20个
+TOTAL_NUMBERS = 80
+DRAW_SIZE = 20
+
+
+def numbers_to_mask(tickets):
+    """将多注号码转换为 (注数, 80) 的布尔矩阵"""
+    mask = np.zeros((len(tickets), TOTAL_NUMBERS), dtype=bool)
+    for row, ticket in enumerate(tickets):
+        mask[row, np.asarray(ticket, dtype=int) - 1] = True
+    return mask
+
+
+def _hit_distribution_chunk(mask, weights, max_hits):
+    """对一批号码做动态规划，返回每注的中奖个数分布"""
+    n_tickets = mask.shape[0]
+    # state[t, h, d]：已处理号码中开出d个、其中h个属于第t注的加权组合和
+    state = np.zeros((n_tickets, max_hits + 1, DRAW_SIZE + 1))
+    state[:, 0, 0] = 1.0
+    shifted = np.empty_like(state)
+
+    for num in range(TOTAL_NUMBERS):
+        # 该号码开出：开出个数+1；若在注内，中奖个数同时+1
+        shifted[:, :, 0] = 0.0
+        shifted[:, :, 1:] = state[:, :, :-1]
+        in_ticket = mask[:, num]
+        if in_ticket.any():
+            hit = shifted[in_ticket]
+            hit[:, 1:, :] = hit[:, :-1, :]
+            hit[:, 0, :] = 0.0
+            shifted[in_ticket] = hit
+        state += weights[num] * shifted
+
+    totals = state[:, :, DRAW_SIZE]
+    return totals / totals.sum(axis=1, keepdims=True)
+
+
+def hit_distribution(tickets, weights=None, chunk_size=4096):
+    """计算每注号码的精确中奖个数分布 P(中h个)
+
+    开奖模型为条件泊松抽样：每个20码组合S出现的概率正比于 ∏_{i∈S} w_i，
+    权重全部相等时即退化为超几何分布。返回形状为 (注数, 最大选号数+1) 的数组。
+    """
+    if weights is None:
+        weights = np.ones(TOTAL_NUMBERS)
+    weights = np.asarray(weights, dtype=float)
+    # 统一缩放权重，避免组合和溢出（不影响概率）
+    weights = weights / weights.mean()
+
+    mask = numbers_to_mask(tickets)
+    max_hits = int(mask.sum(axis=1).max()) if len(tickets) else 0
+
+    result = np.zeros((len(tickets), max_hits + 1))
+    for start in range(0, len(tickets), chunk_size):
+        chunk = mask[start:start + chunk_size]
+        result[start:start + chunk_size] = _hit_distribution_chunk(chunk, weights, max_hits)
+    return result
+
+
+def inclusion_probabilities(weights):
+    """计算给定权重下每个号码的开出概率"""
+    single_tickets = [[num] for num in range(1, TOTAL_NUMBERS + 1)]
+    return hit_distribution(single_tickets, weights)[:, 1]
+
+
+def calibrate_weights(probabilities, max_iter=100, tol=1e-10):
+    """由每个号码的目标开出概率反推抽样权重
+
+    目标概率之和应为20，迭代使各号码的实际开出概率与目标一致。
+    """
+    target = np.clip(np.asarray(probabilities, dtype=float), 1e-6, 1 - 1e-6)
+    target = target * DRAW_SIZE / target.sum()
+
+    weights = target / (1 - target)
+    for _ in range(max_iter):
+        current = inclusion_probabilities(weights)
+        if np.max(np.abs(current - target)) < tol:
+            break
+        weights = weights * target / current
+    return weights
+
+
+def prize_vector(prize_info, numbers_count):
+    """将奖金设置转换为按中奖个数索引的奖金数组"""
+    prizes = np.zeros(numbers_count + 1)
+    for hit_count, prize in prize_info.items():
+        prizes[int(hit_count[1:])] = prize
+    return prizes
+
+
+def wilson_interval(p, n, z=1.959963984540054):
+    """计算比例p（样本量n）的Wilson置信区间"""
+    p = np.asarray(p, dtype=float)
+    center = (p + z ** 2 / (2 * n)) / (1 + z ** 2 / n)
+    margin = z * np.sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2)) / (1 + z ** 2 / n)
+    return np.clip(center - margin, 0, 1), np.clip(center + margin, 0, 1)
+
+
+def binomial_upper_tail(n, k, p):
+    """二项分布 P(X >= k)，X ~ B(n, p)"""
+    if k <= 0:
+        return 1.0
+    if p <= 0:
+        return 0.0
+    if p >= 1:
+        return 1.0
+    log_p, log_q = math.log(p), math.log1p(-p)
+    total = 0.0
+    for i in range(k, n + 1):
+        total += math.exp(math.lgamma(n + 1) - math.lgamma(i + 1) - math.lgamma(n - i + 1) + i * log_p + (n - i) * log_q)
+    return min(total, 1.0)
@@ -0,0 +1,34 @@
+import math
+import numpy as np
+from kl8_probability import hit_distribution, calibrate_weights, inclusion_probabilities, binomial_upper_tail
+
+
+def hypergeometric(numbers_count, hits):
+    """80选20中选numbers_count个号码命中hits个的理论概率"""
+    return math.comb(20, hits) * math.comb(60, numbers_count - hits) / math.comb(80, numbers_count)
+
+
+def test_uniform_weights_match_hypergeometric():
+    tickets = [list(range(1, k + 1)) for k in range(1, 11)]
+    distributions = hit_distribution(tickets)
+    for k, distribution in enumerate(distributions, 1):
+        expected = [hypergeometric(k, h) for h in range(k + 1)]
+        assert np.max(np.abs(distribution[:k + 1] - expected)) < 1e-15
+        assert np.all(distribution[k + 1:] == 0)
+
+
+def test_distribution_does_not_depend_on_uniform_scale():
+    tickets = [[3, 17, 42, 80]]
+    assert np.allclose(hit_distribution(tickets), hit_distribution(tickets, np.full(80, 7.5)))
+
+
+def test_calibration_round_trip():
+    rng = np.random.default_rng(0)
+    probabilities = rng.dirichlet(np.full(80, 50)) * 20
+    weights = calibrate_weights(probabilities)
+    assert np.max(np.abs(inclusion_probabilities(weights) - probabilities)) < 1e-9
+
+
+def test_binomial_upper_tail():
+    assert abs(binomial_upper_tail(10, 3, 0.5) - (1 - 56 / 1024)) < 1e-12
+    assert binomial_upper_tail(10, 0, 0.3) == 1.0
@@ -0,0 +1,190 @@
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+
+
+class KL8Profiler:
+    def __init__(self, capture_cprofile=False, capture_memory=False, record_events=False, max_events=100000):
+        """初始化性能分析器
+
+        capture_cprofile和capture_memory控制每次run()时是否同时采集cProfile和tracemalloc数据；
+        record_events开启后记录Chrome trace事件，最多保留max_events条。
+        """
+        self.capture_cprofile = capture_cprofile
+        self.capture_memory = capture_memory
+        self.record_events = record_events
+        self.max_events = max_events
+        self.dropped_events = 0
+        self.calls = defaultdict(lambda: {'calls': 0, 'total_time': 0.0, 'max_time': 0.0})
+        self.allocations = defaultdict(lambda: {'count': 0, 'bytes': 0})
+        self.events = []
+        self.runs = []
+        self._origin = time.perf_counter()
+
+    def instrument(self, obj, methods=None):
+        """用计时包装对象的公开方法（仅作用于该实例，不修改类），返回实际包装的方法名"""
+        if methods is None:
+            methods = [
+                name for name in dir(type(obj))
+                if not name.startswith('_') and callable(getattr(type(obj), name))
+                and name not in ('enable_profiling', 'disable_profiling')
+            ]
+        wrapped = []
+        for name in methods:
+            # 已包装过（或在实例上被替换过）的方法不再重复包装
+            if name in obj.__dict__:
+                continue
+            method = getattr(obj, name)
+            setattr(obj, name, self._wrap(f"{type(obj).__name__}.{name}", method))
+            wrapped.append(name)
+        return wrapped
+
+    def attach(self, obj):
+        """为对象开启性能分析：包装其公开方法并设置obj.profiler，已开启时返回原有的分析器"""
+        if getattr(obj, 'profiler', None) is not None:
+            return obj.profiler
+        obj.profiler = self
+        obj._profiled_methods = self.instrument(obj)
+        return self
+
+    def detach(self, obj):
+        """关闭对象的性能分析，只移除attach时包装的方法"""
+        for name in getattr(obj, '_profiled_methods', []):
+            obj.__dict__.pop(name, None)
+        obj._profiled_methods = []
+        obj.profiler = None
+
+    def _wrap(self, name, method):
+        """生成记录调用次数和耗时的包装函数"""
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.record_call(name, start, time.perf_counter() - start)
+        return wrapper
+
+    def record_call(self, name, start, elapsed):
+        """记录一次方法调用"""
+        stats = self.calls[name]
+        stats['calls'] += 1
+        stats['total_time'] += elapsed
+        stats['max_time'] = max(stats['max_time'], elapsed)
+        self._add_event({
+            'name': name,
+            'ph': 'X',
+            'ts': (start - self._origin) * 1e6,
+            'dur': elapsed * 1e6,
+            'pid': os.getpid(),
+            'tid': threading.get_ident()
+        })
+
+    def record_allocation(self, site, obj):
+        """记录一次DataFrame/数组的复制或布尔筛选产生的新对象"""
+        if hasattr(obj, 'memory_usage'):
+            nbytes = int(obj.memory_usage(index=True, deep=True).sum())
+        else:
+            nbytes = int(getattr(obj, 'nbytes', 0))
+        stats = self.allocations[site]
+        stats['count'] += 1
+        stats['bytes'] += nbytes
+        self._add_event({
+            'name': site,
+            'ph': 'i',
+            's': 't',
+            'ts': (time.perf_counter() - self._origin) * 1e6,
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'args': {'bytes': nbytes}
+        })
+
+    def _add_event(self, event):
+        """记录一条trace事件，超过上限后只计数"""
+        if not self.record_events:
+            return
+        if len(self.events) >= self.max_events:
+            self.dropped_events += 1
+            return
+        self.events.append(event)
+
+    @contextmanager
+    def run(self, label='run', top=20):
+        """包裹一次完整运行，可选采集cProfile和tracemalloc数据"""
+        profile = cProfile.Profile() if self.capture_cprofile else None
+        started_tracemalloc = self.capture_memory and not tracemalloc.is_tracing()
+        if started_tracemalloc:
+            tracemalloc.start()
+        if profile is not None:
+            profile.enable()
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            elapsed = time.perf_counter() - start
+            if profile is not None:
+                profile.disable()
+            record = {'label': label, 'wall_time': elapsed}
+            self.record_call(f"run:{label}", start, elapsed)
+
+            if profile is not None:
+                stream = io.StringIO()
+                pstats.Stats(profile, stream=stream).sort_stats('cumulative').print_stats(top)
+                record['cprofile'] = stream.getvalue()
+                record['cprofile_stats'] = profile
+
+            if self.capture_memory and tracemalloc.is_tracing():
+                snapshot = tracemalloc.take_snapshot()
+                current, peak = tracemalloc.get_traced_memory()
+                record['memory'] = {
+                    'current': current,
+                    'peak': peak,
+                    'top': [str(stat) for stat in snapshot.statistics('lineno')[:top]]
+                }
+                if started_tracemalloc:
+                    tracemalloc.stop()
+
+            self.runs.append(record)
+
+    def summary(self):
+        """返回结构化的统计结果"""
+        return {
+            'methods': {
+                name: dict(stats, avg_time=stats['total_time'] / stats['calls'])
+                for name, stats in sorted(self.calls.items(), key=lambda x: x[1]['total_time'], reverse=True)
+            },
+            'allocations': dict(self.allocations),
+            'dropped_events': self.dropped_events,
+            'runs': [
+                {key: value for key, value in record.items() if key != 'cprofile_stats'}
+                for record in self.runs
+            ]
+        }
+
+    def to_chrome_trace(self):
+        """转换为Chrome trace格式（可在chrome://tracing或Perfetto中查看）"""
+        return {'traceEvents': self.events, 'displayTimeUnit': 'ms'}
+
+    def save(self, filename, format='json'):
+        """保存统计结果，format为'json'或'chrome'"""
+        data = self.to_chrome_trace() if format == 'chrome' else self.summary()
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+    def print_report(self, top=20):
+        """打印耗时最多的方法和内存分配情况"""
+        print("\n=== 性能分析报告 ===")
+        for name, stats in list(self.summary()['methods'].items())[:top]:
+            print(f"{name}: 调用{stats['calls']}次, 累计{stats['total_time']*1000:.1f}ms, 平均{stats['avg_time']*1000:.2f}ms")
+        if self.allocations:
+            print("\n数据复制/筛选:")
+            for site, stats in sorted(self.allocations.items(), key=lambda x: x[1]['bytes'], reverse=True):
+                print(f"{site}: {stats['count']}次, 共{stats['bytes']/1024/1024:.2f}MB")
@@ -0,0 +1,87 @@
+import json
+import numpy as np
+import pandas as pd
+from kl8_predictor import KL8Predictor
+from kl8_profiler import KL8Profiler
+
+
+def test_enable_profiling_twice_counts_each_call_once():
+    predictor = KL8Predictor()
+    profiler = predictor.enable_profiling()
+    assert predictor.enable_profiling(KL8Profiler()) is profiler
+    predictor.analyze_trend_patterns()
+    assert profiler.calls['KL8Predictor.analyze_trend_patterns']['calls'] == 1
+
+
+def test_events_are_opt_in_and_bounded():
+    predictor = KL8Predictor()
+    profiler = predictor.enable_profiling()
+    predictor.analyze_trend_patterns()
+    assert profiler.events == []
+
+    predictor.disable_profiling()
+    profiler = predictor.enable_profiling(KL8Profiler(record_events=True, max_events=2))
+    for _ in range(3):
+        predictor.analyze_trend_patterns()
+    assert len(profiler.events) == 2
+    assert profiler.dropped_events > 0
+
+
+def test_disable_profiling_restores_methods():
+    predictor = KL8Predictor()
+    original = predictor.analyze_frequency
+    replaced = lambda *args, **kwargs: original(*args, **kwargs)
+    predictor.analyze_frequency = replaced
+    profiler = predictor.enable_profiling()
+    assert 'analyze_frequency' not in predictor._profiled_methods
+    assert 'analyze_trend_patterns' in predictor.__dict__
+
+    predictor.disable_profiling()
+    assert predictor.profiler is None
+    assert 'analyze_trend_patterns' not in predictor.__dict__
+    assert predictor.analyze_trend_patterns.__func__ is KL8Predictor.analyze_trend_patterns
+    # 开启前在实例上替换的方法保持不变
+    assert predictor.analyze_frequency is replaced
+    predictor.analyze_trend_patterns()
+    assert 'KL8Predictor.analyze_trend_patterns' not in profiler.calls
+
+
+def test_record_allocation_counts_object_columns():
+    profiler = KL8Profiler()
+    df = pd.DataFrame({'numbers_list': [list(range(1, 21))] * 100, '开奖号码': ['1,2,3'] * 100})
+    matrix = np.zeros((100, 80))
+    profiler.record_allocation('df', df)
+    profiler.record_allocation('matrix', matrix)
+    assert profiler.allocations['df']['bytes'] == df.memory_usage(index=True, deep=True).sum()
+    assert profiler.allocations['df']['bytes'] > df.memory_usage(index=True).sum()
+    assert profiler.allocations['matrix']['bytes'] == matrix.nbytes
+
+
+def test_chrome_trace_is_valid_json():
+    predictor = KL8Predictor()
+    profiler = predictor.enable_profiling(KL8Profiler(record_events=True))
+    predictor.analyze_frequency(days=30)
+
+    trace = json.loads(json.dumps(profiler.to_chrome_trace()))
+    assert trace['traceEvents']
+    for event in trace['traceEvents']:
+        assert {'name', 'ph', 'ts', 'pid', 'tid'} <= event.keys()
+        assert event['ph'] in ('X', 'i')
+        if event['ph'] == 'X':
+            assert event['dur'] >= 0
+    names = {event['name'] for event in trace['traceEvents']}
+    assert {'KL8Predictor.analyze_frequency', 'analyze_frequency.mask'} <= names
+
+
+def test_run_captures_cprofile_and_memory():
+    predictor = KL8Predictor()
+    profiler = predictor.enable_profiling(KL8Profiler(capture_cprofile=True, capture_memory=True))
+    with profiler.run('predict'):
+        predictor.predict_next_numbers(10)
+
+    record = profiler.runs[-1]
+    assert 'predict_next_numbers' in record['cprofile']
+    assert record['memory']['peak'] > 0
+    assert record['memory']['top']
+    assert profiler.calls['run:predict']['calls'] == 1
+    json.dumps(profiler.summary())
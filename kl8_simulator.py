@@ -0,0 +1,179 @@
+import numpy as np
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from statistics import NormalDist
+from kl8_probability import TOTAL_NUMBERS, DRAW_SIZE, numbers_to_mask, prize_vector, hit_distribution, wilson_interval
+
+
+def _suffix_symmetric_sums(weights):
+    """计算后缀初等对称多项式表 table[i, r] = e_r(w_i, ..., w_80)"""
+    table = np.zeros((TOTAL_NUMBERS + 1, DRAW_SIZE + 1))
+    table[TOTAL_NUMBERS, 0] = 1.0
+    for i in range(TOTAL_NUMBERS - 1, -1, -1):
+        table[i] = table[i + 1]
+        table[i, 1:] += weights[i] * table[i + 1, :-1]
+    return table
+
+
+def generate_draws(rng, n_draws, weights=None):
+    """批量生成模拟开奖，返回 (期数, 80) 的布尔矩阵
+
+    与kl8_probability使用同一个条件泊松开奖模型：依次决定每个号码是否开出，
+    开出概率由剩余号码的初等对称多项式给出。不加权时即为均匀的80选20。
+    """
+    if weights is None:
+        weights = np.ones(TOTAL_NUMBERS)
+    weights = np.asarray(weights, dtype=float)
+    weights = weights / weights.mean()
+    table = _suffix_symmetric_sums(weights)
+
+    mask = np.zeros((n_draws, TOTAL_NUMBERS), dtype=bool)
+    remaining = np.full(n_draws, DRAW_SIZE)
+    uniforms = rng.random((n_draws, TOTAL_NUMBERS))
+    for i in range(TOTAL_NUMBERS):
+        # 还需开出remaining个号码时，第i个号码开出的条件概率
+        prob = weights[i] * table[i + 1, np.maximum(remaining - 1, 0)] / table[i, remaining]
+        prob[remaining == 0] = 0.0
+        drawn = uniforms[:, i] < prob
+        mask[:, i] = drawn
+        remaining -= drawn
+    return mask
+
+
+def _simulate_chunk(args):
+    """模拟一批开奖并统计每注号码的中奖个数分布"""
+    seed, n_draws, ticket_mask, weights = args
+    rng = np.random.default_rng(seed)
+    draws = generate_draws(rng, n_draws, weights)
+
+    # 每期每注的中奖个数
+    hits = (draws.astype(np.float32) @ ticket_mask.T.astype(np.float32)).astype(np.int64)
+    n_tickets = ticket_mask.shape[0]
+    bins = DRAW_SIZE + 1
+    offsets = np.arange(n_tickets) * bins
+    counts = np.bincount((hits + offsets).ravel(), minlength=n_tickets * bins)
+    return counts.reshape(n_tickets, bins)
+
+
+class KL8DrawSimulator:
+    def __init__(self, weights=None, seed=None, chunk_size=50000, workers=None):
+        """初始化模拟器
+
+        weights为80个号码的抽样权重（None表示均匀开奖），seed用于生成可复现的随机流，
+        chunk_size控制每批模拟的期数以限制内存，workers为并行进程数。
+        """
+        self.weights = None if weights is None else np.asarray(weights, dtype=float)
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.workers = workers or os.cpu_count() or 1
+
+    def simulate_tickets(self, tickets, n_draws=1000000):
+        """模拟n_draws期开奖，统计每注号码的中奖个数次数，返回 (注数, 21) 的数组"""
+        ticket_mask = numbers_to_mask(tickets)
+
+        # 每批使用独立的子随机流，结果与进程数无关
+        n_chunks = -(-n_draws // self.chunk_size)
+        seeds = np.random.SeedSequence(self.seed).spawn(n_chunks)
+        sizes = [min(self.chunk_size, n_draws - i * self.chunk_size) for i in range(n_chunks)]
+        tasks = [(seed, size, ticket_mask, self.weights) for seed, size in zip(seeds, sizes)]
+
+        counts = np.zeros((len(tickets), DRAW_SIZE + 1), dtype=np.int64)
+        if self.workers == 1 or n_chunks == 1:
+            for task in tasks:
+                counts += _simulate_chunk(task)
+        else:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                for chunk_counts in executor.map(_simulate_chunk, tasks):
+                    counts += chunk_counts
+        return counts
+
+    def summarize(self, tickets, counts, prize_info=None, confidence=0.95):
+        """根据模拟结果计算中奖分布的置信区间，并给出精确分布和奖金作为对照"""
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        n_draws = counts.sum(axis=1, keepdims=True)
+        exact = hit_distribution(tickets, self.weights)
+        summaries = []
+
+        for ticket, ticket_counts, n, exact_p in zip(tickets, counts, n_draws[:, 0], exact):
+            numbers_count = len(ticket)
+            p = ticket_counts[:numbers_count + 1] / n
+
+            ci_low, ci_high = wilson_interval(p, n, z)
+            summary = {
+                'numbers': list(ticket),
+                'draws': int(n),
+                'hit_probabilities': p,
+                'hit_ci_low': ci_low,
+                'hit_ci_high': ci_high,
+                'exact_hit_probabilities': exact_p[:numbers_count + 1],
+                'mean_hits': float(np.arange(numbers_count + 1) @ p)
+            }
+
+            if prize_info is not None:
+                prizes = prize_vector(prize_info, numbers_count)
+                mean = float(p @ prizes)
+                unobserved = [hits for hits in range(numbers_count + 1) if prizes[hits] > 0 and ticket_counts[hits] == 0]
+
+                # 每期奖金的样本方差给出中心极限区间；模拟中未出现的奖级对方差没有贡献，
+                # 因此上限再加上这些奖级的Wilson概率上界乘以奖金
+                variance = max(float(p @ prizes ** 2) - mean ** 2, 0.0)
+                half_width = z * (variance / n) ** 0.5
+                _, zero_high = wilson_interval(0.0, n, z)
+                unobserved_bound = float(zero_high) * float(prizes[unobserved].sum())
+
+                summary['payout_mean'] = mean
+                summary['payout_ci_low'] = max(mean - half_width, 0.0)
+                summary['payout_ci_high'] = mean + half_width + unobserved_bound
+                summary['payout_exact'] = float(exact_p[:numbers_count + 1] @ prizes)
+                summary['unobserved_tiers'] = [f"中{hits}" for hits in unobserved]
+
+            summaries.append(summary)
+        return summaries
+
+    def run_tickets(self, tickets, n_draws=1000000, prize_info=None, confidence=0.95):
+        """对给定号码进行模拟并返回统计摘要"""
+        counts = self.simulate_tickets(tickets, n_draws)
+        return self.summarize(tickets, counts, prize_info, confidence)
+
+    def run_strategy(self, strategy, n_draws=1000000, prize_info=None, confidence=0.95):
+        """运行一个预测策略（返回多注号码的可调用对象），并对其号码进行模拟"""
+        tickets = [sorted(int(num) for num in ticket) for ticket in strategy()]
+        return self.run_tickets(tickets, n_draws, prize_info, confidence)
+
+
+def print_simulation_report(summaries, confidence=0.95):
+    """打印模拟报告"""
+    for i, summary in enumerate(summaries, 1):
+        print(f"\n第{i}组 {summary['numbers']} (模拟{summary['draws']}期)")
+        print(f"平均命中: {summary['mean_hits']:.3f}个")
+        for hits, p in enumerate(summary['hit_probabilities']):
+            low, high = summary['hit_ci_low'][hits], summary['hit_ci_high'][hits]
+            exact = summary['exact_hit_probabilities'][hits]
+            print(f"{hits}个号码命中: {p*100:.3f}% ({confidence:.0%}区间: {low*100:.3f}% - {high*100:.3f}%, 精确值: {exact*100:.3f}%)")
+        if 'payout_mean' in summary:
+            print(f"每注平均奖金: 模拟{summary['payout_mean']:.4f}元 ({confidence:.0%}区间: "
+                  f"{summary['payout_ci_low']:.4f} - {summary['payout_ci_high']:.4f}), 精确{summary['payout_exact']:.4f}元")
+            if summary['unobserved_tiers']:
+                print(f"模拟中未出现的奖级: {', '.join(summary['unobserved_tiers'])}（区间上限已计入这些奖级的概率上界）")
+
+
+def main():
+    from kl8_predictor import KL8Predictor
+
+    predictor = KL8Predictor()
+    simulator = KL8DrawSimulator(seed=20201028)
+
+    print("\n=== 快乐8随机开奖模拟报告 ===")
+    print(f"模拟时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    summaries = simulator.run_strategy(
+        lambda: [predictor.predict_next_numbers(10) for _ in range(5)],
+        n_draws=1000000,
+        prize_info=predictor.prize_settings['选十']
+    )
+    print_simulation_report(summaries)
+
+    print("\n注意：本模拟结果仅供参考，购彩需理性，请注意控制投注金额。")
+
+if __name__ == "__main__":
+    main()
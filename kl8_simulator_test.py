@@ -0,0 +1,37 @@
+import numpy as np
+from kl8_probability import hit_distribution
+from kl8_simulator import KL8DrawSimulator, generate_draws
+
+
+def test_every_draw_has_twenty_numbers():
+    weights = np.linspace(0.2, 5, 80)
+    draws = generate_draws(np.random.default_rng(0), 10000, weights)
+    assert np.all(draws.sum(axis=1) == 20)
+
+
+def test_weighted_simulation_matches_exact_distribution():
+    weights = np.ones(80)
+    weights[:10] = 5
+    tickets = [list(range(1, 11)), [5, 30, 55, 80]]
+    n_draws = 200000
+    counts = KL8DrawSimulator(weights=weights, seed=1, workers=1).simulate_tickets(tickets, n_draws)
+    exact = hit_distribution(tickets, weights)
+    for ticket_counts, exact_p in zip(counts, exact):
+        p = ticket_counts[:len(exact_p)] / n_draws
+        standard_error = np.sqrt(exact_p * (1 - exact_p) / n_draws)
+        assert np.all(np.abs(p - exact_p) <= 5 * standard_error + 1e-12)
+
+
+def test_results_do_not_depend_on_worker_count():
+    tickets = [[1, 2, 3]]
+    single = KL8DrawSimulator(seed=7, chunk_size=10000, workers=1).simulate_tickets(tickets, 30000)
+    parallel = KL8DrawSimulator(seed=7, chunk_size=10000, workers=3).simulate_tickets(tickets, 30000)
+    assert np.array_equal(single, parallel)
+
+
+def test_payout_interval_covers_exact_payout_with_unobserved_tiers():
+    prize_info = {'中10': 50000, '中9': 800, '中8': 120, '中7': 30, '中6': 8, '中5': 4}
+    simulator = KL8DrawSimulator(seed=11, workers=1)
+    summary = simulator.run_tickets([list(range(1, 11))], 200000, prize_info=prize_info)[0]
+    assert '中10' in summary['unobserved_tiers']
+    assert summary['payout_ci_low'] <= summary['payout_exact'] <= summary['payout_ci_high']